@@ -56,7 +56,9 @@
 
 '''
 
+import functools
 import re
+import sys
 import time
 
 YEAR_LOW = 1900
@@ -66,182 +68,230 @@ Y2K_HIGH = 99
 
 assert Y2K_LOW > 31
 
-MONTHS = [
-   [re.compile('january|januar|jan', re.IGNORECASE), "…m1"],
-   [re.compile('february|februar|feb', re.IGNORECASE), "…m2"],
-   [re.compile('march|marts|mar', re.IGNORECASE), "…m3"],
-   [re.compile('april|apr', re.IGNORECASE), "…m4"],
-   [re.compile('maj|may', re.IGNORECASE), "…m5"],
-   [re.compile('june|juni|jun', re.IGNORECASE), "…m6"],
-   [re.compile('july|juli|jul', re.IGNORECASE), "…m7"],
-   [re.compile('august|aug', re.IGNORECASE), "…m8"],
-   [re.compile('september|sept|sep', re.IGNORECASE), "…m9"],
-   [re.compile('october|oct|oktober|okt', re.IGNORECASE), "…m10"],
-   [re.compile('november|nov', re.IGNORECASE), "…m11"],
-   [re.compile('december|dec', re.IGNORECASE), "…m12"],
-]
-
-def is_year(x):
-    ''' Is x a year '''
-    return YEAR_LOW <= int(x) <= YEAR_HIGH
-
-def is_y2k(x):
-    ''' Is x a two digit year '''
-    return Y2K_LOW <= int(x) <= Y2K_HIGH
-
-def is_month(x):
-    ''' Is x a month number '''
-    return 1 <= int(x) <= 12
-
-def is_day(x):
-    ''' Is x a day number '''
-    return 1 <= int(x) <= 31
+# Month name patterns, in lower case, exactly one entry per month.
+# Add new forms to the existing pattern of their month.  Longer forms
+# must be tried before their prefixes, or the prefix will match and
+# be rejected.
+MONTHS = (
+   ('jan(?:uary|uar)?', "…m1"),
+   ('feb(?:ruary|ruar)?', "…m2"),
+   ('mar(?:ch|ts)?', "…m3"),
+   ('apr(?:il)?', "…m4"),
+   ('ma[jy]', "…m5"),
+   ('jun[ei]?', "…m6"),
+   ('jul[yi]?', "…m7"),
+   ('aug(?:ust)?', "…m8"),
+   ('sep(?:tember|t)?', "…m9"),
+   ('o[ck]t(?:ober)?', "…m10"),
+   ('nov(?:ember)?', "…m11"),
+   ('dec(?:ember)?', "…m12"),
+)
+
+assert len(set(mon_id for _pattern, mon_id in MONTHS)) == len(MONTHS)
+
+# All month names in one regex, the named group tells which month matched.
+# It is matched against lower-cased input, which is much faster than
+# having the regex engine fold case on every comparison.
+MONTH_RE = re.compile(
+    "|".join("(?P<m%s>%s)" % (mon_id[2:], pattern) for pattern, mon_id in MONTHS),
+)
+MONTH_SEARCH = MONTH_RE.search
+
+# Non-ASCII letters which re.IGNORECASE would match to an ASCII letter,
+# such as 'ſ', 'ı' and 'İ'.  Translating these first keeps lower()
+# from changing the length of the input.  No character outside the
+# BMP case-maps to ASCII.
+ASCII_LETTER_FULLMATCH = re.compile('[a-z]', re.IGNORECASE).fullmatch
+CASE_FOLD = {
+    ord(c): a
+    for c in map(chr, range(0x80, 0x10000))
+    if ASCII_LETTER_FULLMATCH(c)
+    for a in "abcdefghijklmnopqrstuvwxyz"
+    if re.fullmatch(a, c, re.IGNORECASE)
+}
+
+# Runs of numbers and non-numbers
+SPLIT_RE = re.compile(r'\d+|\D+')
+SPLIT_FINDALL = SPLIT_RE.findall
+DIGIT_SEARCH = re.compile(r'\d').search
+
+# Acceptable values, as sets for fast membership tests
+YEARS = frozenset(range(YEAR_LOW, YEAR_HIGH + 1))
+Y2K_YEARS = frozenset(range(Y2K_LOW, Y2K_HIGH + 1))
+MONTH_NUMBERS = frozenset(range(1, 13))
+DAY_NUMBERS = frozenset(range(1, 32))
+
+# Zero padded month and day numbers
+ZERO_PAD = tuple("%02d" % i for i in range(32))
+
+def two_digits(x, i):
+    ''' Two ASCII digits at x[i] as an integer '''
+    return (ord(x[i]) - 48) * 10 + ord(x[i + 1]) - 48
+
+def four_digits(x, i):
+    ''' Four ASCII digits at x[i] as an integer '''
+    return (
+        (ord(x[i]) - 48) * 1000 + (ord(x[i + 1]) - 48) * 100 +
+        (ord(x[i + 2]) - 48) * 10 + ord(x[i + 3]) - 48
+    )
+
+def range_re(low, high, width):
+    ''' Regex matching the width digit numbers [low…high] '''
+    alts = []
+    i = low
+    while i <= high:
+        wild = width - 1
+        while i % 10**wild or i + 10**wild - 1 > high:
+            wild -= 1
+        if wild:
+            alts.append(str(i).zfill(width)[:width - wild] + r"\d" * wild)
+            i += 10**wild
+            continue
+        # Collapse a run of final digits into a character class
+        last = min(high, i - i % 10 + 9)
+        alts.append(str(i).zfill(width)[:-1] + "[%d-%d]" % (i % 10, last % 10))
+        i = last + 1
+    return "(?:" + "|".join(alts) + ")"
+
+# Numbers which can be a complete date, the named group tells the layout
+YEAR_PAT = range_re(YEAR_LOW, YEAR_HIGH, 4)
+Y2K_PAT = range_re(Y2K_LOW, Y2K_HIGH, 2)
+MONTH_PAT = range_re(1, 12, 2)
+DAY_PAT = range_re(1, 31, 2)
+NUM_DATE_RE = re.compile(
+    "(?P<ymd8>" + YEAR_PAT + MONTH_PAT + DAY_PAT + ")|" +
+    "(?P<dmy8>" + DAY_PAT + MONTH_PAT + YEAR_PAT + ")|" +
+    "(?P<ym6>" + YEAR_PAT + MONTH_PAT + ")|" +
+    "(?P<ymd6>" + Y2K_PAT + MONTH_PAT + DAY_PAT + ")|" +
+    "(?P<dmy6>" + DAY_PAT + MONTH_PAT + Y2K_PAT + ")|" +
+    "(?P<ym4>" + Y2K_PAT + MONTH_PAT + ")"
+)
+NUM_DATE_FULLMATCH = NUM_DATE_RE.fullmatch
+
+NUM_DATE_HANDLERS = {
+    "ymd8": lambda x: (four_digits(x, 0), two_digits(x, 4), two_digits(x, 6)),
+    "dmy8": lambda x: (four_digits(x, 4), two_digits(x, 2), two_digits(x, 0)),
+    "ym6": lambda x: (four_digits(x, 0), two_digits(x, 4), None),
+    "ymd6": lambda x: (two_digits(x, 0) + 1900, two_digits(x, 2), two_digits(x, 4)),
+    "dmy6": lambda x: (two_digits(x, 4) + 1900, two_digits(x, 2), two_digits(x, 0)),
+    "ym4": lambda x: (two_digits(x, 0), two_digits(x, 2), None),
+}
+
+# Lengths of numbers which can contribute to a date
+VALID_LENS = frozenset((1, 2, 4, 6, 8))
+
+def find_month(x):
+    ''' Find the first acceptable month name in x '''
+    if x.isascii():
+        lx = x.lower()
+    else:
+        lx = x.translate(CASE_FOLD).lower()
+    rejected = {}
+    pos = 0
+    while True:
+        match = MONTH_SEARCH(lx, pos)
+        if match is None:
+            return None
+        group = match.lastgroup
+        end = match.end()
+        # Resume inside this hit, another month name may start there
+        pos = match.start() + 1
+        # Within a run of non-digits, a month name followed by
+        # letters disqualifies that month
+        if group in rejected and not DIGIT_SEARCH(lx, rejected[group], match.start()):
+            continue
+        if end < len(x) and x[end].isalpha():
+            rejected[group] = end
+            continue
+        return match
 
+@functools.lru_cache(maxsize=65536)
 def interpret(instr):
     '''
     Try to interpret instr as a date, return as much of "YYYY-[MM[-DD]]" as we can.
     '''
 
     instr = instr.strip()
-    if not instr:
+    if len(instr) < 2:
+        # The shortest date is a two digit year
         return None
 
     year = None
     month = None
     day = None
-    nbrs = []
+    nbrs = None
 
     # Split into runs of numbers and non-numbers
-    l = [instr[0]]
-    for i in instr[1:]:
-        if i.isdigit() ^ l[-1][-1].isdigit():
-            l.append(i)
-        else:
-            l[-1] += i
+    l = SPLIT_FINDALL(instr)
 
     # Classify the numbers we found
-    for n, x in list(enumerate(l)):
-        if not x.isdigit():
+    for n, x in enumerate(l):
+        if not x.isdecimal() or len(x) not in VALID_LENS:
             continue
         v = int(x)
+        if not x.isascii():
+            x = str(v).zfill(len(x))
 
-        if len(x) == 8 and is_year(x[:4]) and is_month(x[4:6]) and is_day(x[6:]):
-            year = int(x[:4])
-            month = int(x[4:6])
-            day = int(x[6:])
-            break
-
-        if len(x) == 8 and is_day(x[:2]) and is_month(x[2:4]) and is_year(x[4:]):
-            year = int(x[4:])
-            month = int(x[2:4])
-            day = int(x[:2])
-            break
-
-        if len(x) == 6 and is_year(x[:4]) and is_month(x[4:]):
-            year = int(x[:4])
-            month = int(x[4:6])
-            day = None
-            break
-
-        if len(x) == 6 and is_y2k(x[:2]) and is_month(x[2:4]) and is_day(x[4:]):
-            year = int(x[:2]) + 1900
-            month = int(x[2:4])
-            day = int(x[4:])
-            break
-
-        if len(x) == 6 and is_day(x[:2]) and is_month(x[2:4]) and is_y2k(x[4:]):
-            year = int(x[4:]) + 1900
-            month = int(x[2:4])
-            day = int(x[:2])
-            break
-
-        if year is None and len(x) == 4 and is_y2k(x[:2]) and is_month(x[2:]):
-            year = int(x[:2])
-            month = int(x[2:])
-            day = None
+        match = NUM_DATE_FULLMATCH(x)
+        if match is not None and (year is None or match.lastgroup != "ym4"):
+            year, month, day = NUM_DATE_HANDLERS[match.lastgroup](x)
             break
+        if len(x) > 4:
+            continue
 
-        if year is None and len(x) == 4 and is_year(v):
+        if year is None and len(x) == 4 and v in YEARS:
             l[n] = "…y" + x
             year = v
-        elif year is None and len(x) == 2 and is_y2k(v):
+        elif year is None and len(x) == 2 and v in Y2K_YEARS:
             l[n] = "…y19" + x
             year = 1900 + v
-        elif day is None and len(x) == 2 and v > 12 and is_day(v):
+        elif day is None and len(x) == 2 and v > 12 and v in DAY_NUMBERS:
             l[n] = "…d" + x
             day = v
         elif len(x) <= 2 and v:
             l[n] = "…n" + x
-            nbrs.append(v)
+            if nbrs is None:
+                nbrs = [v]
+            else:
+                nbrs.append(v)
 
     # Look for month names
-    n = 0
-    while n < len(l) and month is None:
-        first_match = None
-        first_mon_id = None
-        for regex, mon_id in MONTHS:
-            match = regex.search(l[n])
-            if match is None:
-                continue
-            span = match.span()
-            if (l[n]+" ")[span[1]].isalpha():
-                continue
-            if first_match is None or span < first_match.span():
-                first_match = match
-                first_mon_id = mon_id
-        if first_match is None:
-            n += 1
-            continue
-        x = l.pop(n)
-        span = first_match.span()
-        if span[0] > 0:
-            l.insert(n, x[:span[0]])
-            n += 1
-        l.insert(n, first_mon_id)
-        month = l[n][2:]
-        n += 1
-        if span[1] < len(x):
-            l.insert(n, x[span[1]:])
+    if month is None:
+        match = find_month(instr)
+        if match is not None:
+            month = int(match.lastgroup[1:])
 
     if year is None:
         return None
 
-    year = int(year)
-    if month is not None:
-        month = int(month)
-    if day is not None:
-        day = int(day)
+    if nbrs is None:
+        nbrs = ()
 
     if None not in (month, day):
-        return "%04d-%02d-%02d" % (year, month, day)
+        return f"{year:04d}-{ZERO_PAD[month]}-{ZERO_PAD[day]}"
 
     if month is not None and len(nbrs) == 0:
-        return "%04d-%02d" % (year, month)
+        return f"{year:04d}-{ZERO_PAD[month]}"
 
-    if month is not None and len(nbrs) == 1 and is_day(nbrs[0]):
-        return "%04d-%02d-%02d" % (year, month, nbrs[0])
+    if month is not None and len(nbrs) == 1 and nbrs[0] in DAY_NUMBERS:
+        return f"{year:04d}-{ZERO_PAD[month]}-{ZERO_PAD[nbrs[0]]}"
 
-    if day is not None and len(nbrs) == 1 and is_month(nbrs[0]):
-        return "%04d-%02d-%02d" % (year, nbrs[0], day)
+    if day is not None and len(nbrs) == 1 and nbrs[0] in MONTH_NUMBERS:
+        return f"{year:04d}-{ZERO_PAD[nbrs[0]]}-{ZERO_PAD[day]}"
 
-    if month is None and day is None and len(nbrs) == 1 and is_month(nbrs[0]):
-        return "%04d-%02d" % (year, nbrs[0])
+    if month is None and day is None and len(nbrs) == 1 and nbrs[0] in MONTH_NUMBERS:
+        return f"{year:04d}-{ZERO_PAD[nbrs[0]]}"
 
-    if len(nbrs) == 2:
-        x = "".join(l)
-        if l[-1][:2] == "…y" and is_day(nbrs[0]) and is_month(nbrs[1]):
-            for sep in "-.":
-                if x.count(sep) == 2:
-                    return "%04d-%02d-%02d" % (year, nbrs[1], nbrs[0])
-        if l[0][:2] == "…y" and is_day(nbrs[1]) and is_month(nbrs[0]):
-            for sep in "-.":
-                if x.count(sep) == 2:
-                    return "%04d-%02d-%02d" % (year, nbrs[0], nbrs[1])
+    if len(nbrs) == 2 and (instr.count("-") == 2 or instr.count(".") == 2):
+        if l[-1][:2] == "…y" and nbrs[0] in DAY_NUMBERS and nbrs[1] in MONTH_NUMBERS:
+            return f"{year:04d}-{ZERO_PAD[nbrs[1]]}-{ZERO_PAD[nbrs[0]]}"
+        if l[0][:2] == "…y" and nbrs[1] in DAY_NUMBERS and nbrs[0] in MONTH_NUMBERS:
+            return f"{year:04d}-{ZERO_PAD[nbrs[0]]}-{ZERO_PAD[nbrs[1]]}"
 
     if month is not None:
-        return "%04d-%02d" % (year, month)
+        return f"{year:04d}-{ZERO_PAD[month]}"
 
-    return "%04d" % year
+    return f"{year:04d}"
 
 def main_tty():
     ''' Trivial interactive test function '''
@@ -252,17 +302,17 @@ def main_tty():
             break
         print("\t", i, "=>", interpret(i))
 
+def interpret_batch(strings):
+    ''' Interpret an iterable of strings, yielding the results in order '''
+    return map(interpret, strings)
+
 def main_batch():
     ''' Trivial interactive test function '''
-    while True:
-        try:
-            i = input()
-        except EOFError:
-            break
-        print(interpret(i))
+    write = sys.stdout.write
+    for result in interpret_batch(sys.stdin):
+        write("%s\n" % result)
 
 if __name__ == "__main__":
-    import sys
     import os
     if os.isatty(sys.stdin.fileno()):
         main_tty()